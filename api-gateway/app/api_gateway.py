@@ -1,17 +1,148 @@
 import os
+import time
 import logging
+import threading
+import grpc
 import requests
 from flask import Flask, request, jsonify
 from .service_registry import ServiceRegistry
+from .registry_snapshot import SharedRegistry
+from service_runtime.tracing import init_tracing, phase, outgoing_headers
+from .load_balancer import LocalityBalancer
+from .grpc_transport import GrpcTransport
 
 
 app = Flask(__name__)
-registry = ServiceRegistry()
+init_tracing(app, 'gateway')
+
+# Pooled connections to the backend services, reused across requests
+session = requests.Session()
+balancer = LocalityBalancer()
+# Only safe methods are retried on another instance after an overload reply
+RETRYABLE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Forward to instances that advertise metadata["grpc_port"] over multiplexed
+# gRPC channels instead of one HTTP/1.1 request per connection
+USE_GRPC = os.getenv('BACKEND_TRANSPORT', 'http') == 'grpc'
+grpc_transport = GrpcTransport()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+WARMUP_RETRY_INTERVAL = float(os.getenv('WARMUP_RETRY_INTERVAL', 2))
+WARMUP_REFRESH_INTERVAL = float(os.getenv('WARMUP_REFRESH_INTERVAL', 30))
+
+_registry = None
+_registry_lock = threading.Lock()
+_warm_up_thread = None
+readiness = {"registry": False, "upstreams": False}
+
+# Under gunicorn every warmed-up worker leaves a marker here, so any worker
+# answering /readyz can tell whether all of its siblings are warm too
+READINESS_DIR = os.getenv('READINESS_DIR')
+EXPECTED_WORKERS = int(os.getenv('GATEWAY_WORKERS', 1))
+
+
+def get_registry():
+    """
+    Return the service registry, connecting on first use so the gateway
+    can start serving before etcd is reachable
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                # With a snapshot path set, workers read the registry written by a single
+                # snapshot writer instead of each opening their own etcd connection
+                _registry = SharedRegistry() if os.getenv('REGISTRY_SNAPSHOT_PATH') else ServiceRegistry()
+    return _registry
+
+
+def warm_up():
+    """
+    Pre-fetch the registry, retrying until etcd or the snapshot can be read,
+    and open a pooled connection to every registered instance. An empty
+    registry is ready: services register through this gateway. Instances
+    that register later are warmed up every WARMUP_REFRESH_INTERVAL.
+    """
+    while True:
+        try:
+            services = get_registry().list_all_services()
+            break
+        except Exception as e:
+            logger.warning(f"Registry warm-up failed, retrying: {e}")
+        time.sleep(WARMUP_RETRY_INTERVAL)
+    readiness["registry"] = True
+
+    warmed = set()
+    warm_upstreams(services, warmed)
+    readiness["upstreams"] = True
+    if READINESS_DIR:
+        open(os.path.join(READINESS_DIR, str(os.getpid())), 'w').close()
+    logger.info("Gateway warm-up complete")
+
+    while True:
+        time.sleep(WARMUP_REFRESH_INTERVAL)
+        try:
+            warm_upstreams(get_registry().list_all_services(), warmed)
+        except Exception as e:
+            logger.warning(f"Failed to refresh upstream connections: {e}")
+
+
+def warm_upstreams(services, warmed):
+    """
+    Open a pooled connection to each instance not already in warmed
+    """
+    for instances in services.values():
+        for service_info in instances.values():
+            service_url = f"http://{service_info['host']}:{service_info['port']}/"
+            if service_url in warmed:
+                continue
+            try:
+                session.head(service_url, timeout=5)
+                warmed.add(service_url)
+            except requests.RequestException as e:
+                logger.warning(f"Failed to warm up connection to {service_url}: {e}")
+
+
+def warm_workers():
+    """
+    Count the live workers that have finished warm-up
+    """
+    count = 0
+    for marker in os.listdir(READINESS_DIR):
+        try:
+            os.kill(int(marker), 0)
+        except (ValueError, ProcessLookupError):
+            continue
+        except PermissionError:
+            pass
+        count += 1
+    return count
+
+
+def start_warm_up():
+    """
+    Run warm_up in a background thread, once per process
+    """
+    global _warm_up_thread
+    if _warm_up_thread is None:
+        _warm_up_thread = threading.Thread(target=warm_up, name="gateway-warm-up", daemon=True)
+        _warm_up_thread.start()
+
+
+def is_overloaded(status, headers):
+    """
+    Whether an instance is shedding load: 429, or 503 with Retry-After.
+    A bare 503 is an application error, such as a dependency being down,
+    and is passed through without ejecting the instance.
+    """
+    if status == 429:
+        return True
+    return status == 503 and any(key.lower() == 'retry-after' for key, _ in headers)
+
+
 def route_request(service_name, path):
     """
     Route request to an available service instance
@@ -20,7 +151,8 @@ def route_request(service_name, path):
     :return: Response from the service
     """
     # Discover available service instances
-    services = registry.discover_service(service_name)
+    with phase('registry'):
+        services = get_registry().discover_service(service_name)
 
     if not services:
         logger.warning(f"No services available for {service_name}")
@@ -30,13 +162,17 @@ def route_request(service_name, path):
             "available_services": list(services.keys()) if services else []
         }), 503
 
-    # More robust load balancing with multiple attempts
+    if USE_GRPC:
+        grpc_transport.prune(services)
+
+    # Prefer local instances of the requested version, trying up to three
     attempts = 3
-    for _ in range(attempts):
+    candidates = balancer.candidates(services, request.headers.get('X-Service-Version'))
+    last_attempt = min(attempts, len(candidates)) - 1
+    for attempt, (service_key, service_info) in enumerate(candidates[:attempts]):
         try:
-            # Random service selection
-            service_info = list(services.values())[0]
             service_url = f"http://{service_info['host']}:{service_info['port']}"
+            grpc_port = service_info.get('metadata', {}).get('grpc_port')
 
             # Preserve the original request path
             stripped_path = path if f"/{service_name}/" in request.path else request.path.split(f"/{service_name}/")[-1]
@@ -44,26 +180,49 @@ def route_request(service_name, path):
 
             logger.info(f"Routing request to: {target_url}")
 
-            # Forward the request
-            response = requests.request(
-                method=request.method,
-                url=target_url,
-                headers={k: v for k, v in request.headers if k.lower() not in ['host', 'content-length']},
-                data=request.get_data(),
-                params=request.args,
-                timeout=5  # Add timeout to prevent hanging
-            )
+            # Forward the request, continuing the trace into the service
+            headers = {k: v for k, v in request.headers if k.lower() not in ['host', 'content-length']}
+            headers.update(outgoing_headers())
+
+            if USE_GRPC and grpc_port:
+                with phase('upstream'), balancer.track(service_key):
+                    reply = grpc_transport.forward(
+                        service_key,
+                        service_info['host'],
+                        grpc_port,
+                        method=request.method,
+                        path=f"/{stripped_path}".rstrip('/') or '/',
+                        query=request.query_string.decode('utf-8'),
+                        headers=headers,
+                        body=request.get_data()
+                    )
+                result = reply.body, reply.status, list(reply.headers.items())
+            else:
+                with phase('upstream'), balancer.track(service_key):
+                    response = session.request(
+                        method=request.method,
+                        url=target_url,
+                        headers=headers,
+                        data=request.get_data(),
+                        params=request.args,
+                        timeout=5  # Add timeout to prevent hanging
+                    )
+                result = response.content, response.status_code, list(response.headers.items())
+
+            # Back off from an overloaded instance, and try the next one if the request is safe to repeat
+            if is_overloaded(result[1], result[2]):
+                balancer.eject(service_key)
+                if attempt < last_attempt and request.method in RETRYABLE_METHODS:
+                    logger.warning(f"{target_url} answered {result[1]}, trying another instance")
+                    continue
 
             # Return the response from the service
-            return (
-                response.content,
-                response.status_code,
-                response.headers.items()
-            )
+            return result
 
-        except requests.RequestException as e:
+        except (requests.RequestException, grpc.RpcError) as e:
             logger.error(f"Service request failed: {e}")
-            # Continue to next service if available
+            # Skip this instance for a while and continue to the next one
+            balancer.eject(service_key)
             continue
 
     # If all services fail
@@ -93,45 +252,104 @@ def showtime_service(path):
 def booking_service(path):
     return route_request('bookings', path)
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok"}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    checks = dict(readiness)
+    registry = get_registry()
+    if isinstance(registry, SharedRegistry):
+        # Workers route from the snapshot, so a stalled writer means stale routes
+        checks["registry_snapshot"] = registry.is_fresh()
+    if READINESS_DIR:
+        checks["workers"] = warm_workers() >= EXPECTED_WORKERS
+    ready = all(checks.values())
+    return jsonify({
+        "status": "ready" if ready else "warming up",
+        "checks": checks
+    }), 200 if ready else 503
+
 @app.route('/register', methods=['POST'])
 def register_service():
     service_data = request.json
-    registry.register_service(
+    get_registry().register_service(
         service_name=service_data['name'],
         host=service_data['host'],
         port=service_data['port'],
-        metadata=service_data.get('metadata', {})
+        metadata=service_data.get('metadata', {}),
+        ttl=service_data.get('ttl')
     )
     return jsonify({"status": "Service registered successfully"}), 201
 
 @app.route('/unregister', methods=['POST'])
 def unregister_service():
     service_data = request.json
-    registry.deregister_service(service_data['name'], service_data['host'], service_data['port'])
+    get_registry().deregister_service(service_data['name'], service_data['host'], service_data['port'])
     return jsonify({"status": "Service unregistered successfully"}), 200
 
+def batch_instances(required_fields):
+    """
+    Read the 'services' list from a batch request body
+    :param required_fields: Fields every instance must have
+    :return: The list of instances, or None if the body is invalid
+    """
+    body = request.get_json(silent=True)
+    instances = body.get('services') if isinstance(body, dict) else None
+    if not isinstance(instances, list):
+        return None
+    for instance in instances:
+        if not isinstance(instance, dict) or any(field not in instance for field in required_fields):
+            return None
+    return instances
+
+@app.route('/register/batch', methods=['POST'])
+def register_services():
+    instances = batch_instances(('name', 'host', 'port'))
+    if instances is None:
+        return jsonify({"status": "error", "message": "Expected a JSON body with a 'services' list"}), 400
+    get_registry().register_services(instances)
+    return jsonify({"status": f"{len(instances)} services registered successfully"}), 201
+
+@app.route('/unregister/batch', methods=['POST'])
+def unregister_services():
+    instances = batch_instances(('name', 'host', 'port'))
+    if instances is None:
+        return jsonify({"status": "error", "message": "Expected a JSON body with a 'services' list"}), 400
+    get_registry().deregister_services(instances)
+    return jsonify({"status": f"{len(instances)} services unregistered successfully"}), 200
+
+@app.route('/services', methods=['GET'])
+def list_services():
+    return jsonify(get_registry().list_all_services()), 200
+
 if __name__ == '__main__':
-    # Register services on startup
-    registry.register_service(
-        'users',
-        os.getenv('USER_SERVICE_HOST', 'localhost'),
-        int(os.getenv('USER_SERVICE_PORT', 5000))
-    )
-    registry.register_service(
-        'movies',
-        os.getenv('MOVIES_SERVICE_HOST', 'localhost'),
-        int(os.getenv('MOVIES_SERVICE_PORT', 5001))
-    )
-    registry.register_service(
-        'showtimes',
-        os.getenv('SHOWTIMES_SERVICE_HOST', 'localhost'),
-        int(os.getenv('SHOWTIMES_SERVICE_PORT', 5002))
-    )
-    registry.register_service(
-        'bookings',
-        os.getenv('BOOKINGS_SERVICE_HOST', 'localhost'),
-        int(os.getenv('BOOKINGS_SERVICE_PORT', 5003))
-    )
+    # Register services on startup in a single etcd transaction
+    get_registry().register_services([
+        {
+            'name': 'users',
+            'host': os.getenv('USER_SERVICE_HOST', 'localhost'),
+            'port': int(os.getenv('USER_SERVICE_PORT', 5000))
+        },
+        {
+            'name': 'movies',
+            'host': os.getenv('MOVIES_SERVICE_HOST', 'localhost'),
+            'port': int(os.getenv('MOVIES_SERVICE_PORT', 5001))
+        },
+        {
+            'name': 'showtimes',
+            'host': os.getenv('SHOWTIMES_SERVICE_HOST', 'localhost'),
+            'port': int(os.getenv('SHOWTIMES_SERVICE_PORT', 5002))
+        },
+        {
+            'name': 'bookings',
+            'host': os.getenv('BOOKINGS_SERVICE_HOST', 'localhost'),
+            'port': int(os.getenv('BOOKINGS_SERVICE_PORT', 5003))
+        }
+    ])
+
+    start_warm_up()
 
     # Run the API Gateway
     app.run(
@@ -0,0 +1,60 @@
+import threading
+from typing import Dict, Any
+
+import grpc
+
+from service_runtime import cinema_pb2
+
+FORWARD_METHOD = "/cinema.Backend/Forward"
+
+
+class GrpcTransport:
+    def __init__(self):
+        """
+        Forward gateway requests over one multiplexed gRPC channel per
+        service instance, shared by every request thread in the worker
+        """
+        # service_key -> (target, channel, forwarder)
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def _forwarder(self, service_key: str, target: str):
+        entry = self._channels.get(service_key)
+        if entry is None or entry[0] != target:
+            with self._lock:
+                entry = self._channels.get(service_key)
+                if entry is None or entry[0] != target:
+                    if entry is not None:
+                        entry[1].close()
+                    channel = grpc.insecure_channel(target)
+                    forwarder = channel.unary_unary(
+                        FORWARD_METHOD,
+                        request_serializer=cinema_pb2.HttpRequest.SerializeToString,
+                        response_deserializer=cinema_pb2.HttpResponse.FromString
+                    )
+                    entry = self._channels[service_key] = (target, channel, forwarder)
+        return entry[2]
+
+    def forward(self, service_key: str, host: str, port: int, method: str, path: str, query: str,
+                headers: Dict[str, str], body: bytes, timeout: float = 5) -> cinema_pb2.HttpResponse:
+        """
+        Send one HTTP request to a service's gRPC port
+
+        :param service_key: Registry key of the instance, which owns the channel
+        :param host: Service host
+        :param port: Service gRPC port, from the instance's metadata["grpc_port"]
+        :return: cinema_pb2.HttpResponse with status, headers and body
+        """
+        return self._forwarder(service_key, f"{host}:{port}")(
+            cinema_pb2.HttpRequest(method=method, path=path, query=query, headers=headers, body=body),
+            timeout=timeout
+        )
+
+    def prune(self, services: Dict[str, Any]):
+        """
+        Close the channels of deregistered instances of the services being routed
+        """
+        prefixes = tuple({service_key.rsplit('/', 1)[0] + '/' for service_key in services})
+        with self._lock:
+            for service_key in [k for k in self._channels if k.startswith(prefixes) and k not in services]:
+                self._channels.pop(service_key)[1].close()
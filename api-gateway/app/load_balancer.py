@@ -0,0 +1,124 @@
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Dict, Any, List, Tuple
+
+
+class LocalityBalancer:
+    def __init__(self, zone: str = None, rack: str = None,
+                 ejection_seconds: float = None, max_in_flight: int = None):
+        """
+        Order service instances so the gateway prefers its own rack and zone,
+        crossing zones only when local instances are ejected or overloaded.
+
+        Instances are ejected when a request to them fails or they answer
+        429 (or 503 with Retry-After), which every worker observes independently. In-flight counts
+        are per worker process, so max_in_flight limits the concurrent
+        requests one worker sends to an instance (gunicorn runs the gateway
+        with threaded workers so these counts are meaningful).
+
+        :param zone: Zone of this gateway, matched against instance metadata["zone"]
+        :param rack: Rack of this gateway, matched against instance metadata["rack"]
+        :param ejection_seconds: How long a failed instance is skipped
+        :param max_in_flight: Concurrent requests per instance before it counts as overloaded, 0 for no limit
+        """
+        self.zone = zone or os.getenv('GATEWAY_ZONE')
+        self.rack = rack or os.getenv('GATEWAY_RACK')
+        self.ejection_seconds = ejection_seconds or float(os.getenv('INSTANCE_EJECTION_SECONDS', 30))
+        self.max_in_flight = max_in_flight or int(os.getenv('INSTANCE_MAX_IN_FLIGHT', 0))
+        self._ejected = {}
+        self._in_flight = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def candidates(self, services: Dict[str, Any], version: str = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Order instances for routing: available local instances first, then
+        available remote ones, then everything else as a last resort
+
+        :param services: Instances from discover_service, keyed by etcd key
+        :param version: Requested metadata["version"] subset, if any
+        :return: List of (key, service_info) in the order they should be tried
+        """
+        self._prune(services)
+
+        tiers = [[], [], []]
+        for service_key, service_info in self._subset(services, version):
+            tiers[self._distance(service_info)].append((service_key, service_info))
+
+        with self._lock:
+            in_flight = {key: self._in_flight.get(key, 0) for key in services}
+            ejected = {key for key, until in self._ejected.items() if until > time.monotonic()}
+
+        available, unavailable = [], []
+        for tier in tiers:
+            random.shuffle(tier)
+            tier.sort(key=lambda instance: in_flight[instance[0]])
+            for instance in tier:
+                is_available = instance[0] not in ejected and not self._is_overloaded(instance, in_flight)
+                (available if is_available else unavailable).append(instance)
+        return available + unavailable
+
+    @contextmanager
+    def track(self, service_key: str):
+        """
+        Count a request against an instance while it is in flight
+        """
+        with self._lock:
+            self._in_flight[service_key] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[service_key] -= 1
+
+    def eject(self, service_key: str):
+        """
+        Skip an instance that just failed or reported overload for ejection_seconds
+        """
+        with self._lock:
+            self._ejected[service_key] = time.monotonic() + self.ejection_seconds
+
+    @staticmethod
+    def _subset(services: Dict[str, Any], version: str = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Select the requested version, or the stable (non-canary) instances
+        when no version was requested or none match it
+        """
+        instances = list(services.items())
+        if version:
+            matching = [i for i in instances if i[1].get('metadata', {}).get('version') == version]
+            if matching:
+                return matching
+        stable = [i for i in instances if not i[1].get('metadata', {}).get('canary')]
+        return stable or instances
+
+    def _distance(self, service_info: Dict[str, Any]) -> int:
+        """
+        0 for the same rack and zone, 1 for the same zone, 2 otherwise
+        """
+        metadata = service_info.get('metadata', {})
+        if not self.zone or metadata.get('zone') != self.zone:
+            return 2
+        if self.rack and metadata.get('rack') == self.rack:
+            return 0
+        return 1
+
+    def _is_overloaded(self, instance: Tuple[str, Dict[str, Any]], in_flight: Dict[str, int]) -> bool:
+        service_key, service_info = instance
+        max_in_flight = service_info.get('metadata', {}).get('max_in_flight', self.max_in_flight)
+        return bool(max_in_flight) and in_flight[service_key] >= max_in_flight
+
+    def _prune(self, services: Dict[str, Any]):
+        """
+        Forget state for deregistered instances of the services being routed
+        """
+        prefixes = tuple({service_key.rsplit('/', 1)[0] + '/' for service_key in services})
+        with self._lock:
+            for service_key in [k for k in self._ejected if k.startswith(prefixes) and k not in services]:
+                del self._ejected[service_key]
+            for service_key in [k for k, count in self._in_flight.items()
+                                if count == 0 and k.startswith(prefixes) and k not in services]:
+                del self._in_flight[service_key]
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List
+from .service_registry import ServiceRegistry
+
+DEFAULT_SNAPSHOT_PATH = '/dev/shm/api-gateway-registry.json'
+
+
+class RegistrySnapshotWriter:
+    def __init__(self, path: str = None, interval: float = None, registry: ServiceRegistry = None):
+        """
+        Maintain a single registry snapshot file that gateway workers read
+
+        :param path: Snapshot file path, ideally on a tmpfs such as /dev/shm
+        :param interval: Seconds between full refreshes when no watch event arrives
+        :param registry: Registry used to read etcd
+        """
+        self.path = path or os.getenv('REGISTRY_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH)
+        self.interval = interval or float(os.getenv('REGISTRY_SNAPSHOT_INTERVAL', 5))
+        self.registry = registry or ServiceRegistry()
+        self.logger = logging.getLogger(__name__)
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._watch_id = None
+
+    def write_snapshot(self):
+        """
+        Read every service from etcd and atomically replace the snapshot file
+        """
+        snapshot = {
+            "updated_at": time.time(),
+            "services": self.registry.list_all_services()
+        }
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.registry-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            # Readers see either the old or the new file, never a partial write
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _on_watch_event(self, response):
+        """
+        Refresh on every change. A broken watch stream delivers an error and
+        drops its callbacks, so mark the watch for re-registration.
+        """
+        if isinstance(response, Exception):
+            self.logger.warning(f"Registry watch failed, re-establishing: {response}")
+            self._watch_id = None
+        self._changed.set()
+
+    def _ensure_watch(self):
+        if self._watch_id is not None:
+            return
+        try:
+            self._watch_id = self.registry.client.add_watch_prefix_callback(
+                "/services/", self._on_watch_event
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to watch registry, polling until the watch is re-established: {e}")
+
+    def run(self):
+        """
+        Refresh the snapshot whenever etcd reports a change, or every interval.
+        The snapshot is rewritten at least every interval so readers can tell
+        a live writer from a dead one by its updated_at.
+        """
+        while not self._stopped.is_set():
+            self._ensure_watch()
+            self._changed.clear()
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                self.logger.error(f"Failed to write registry snapshot: {e}")
+            self._changed.wait(self.interval)
+
+    def stop(self):
+        """
+        Stop refreshing the snapshot and release the etcd client
+        """
+        self._stopped.set()
+        self._changed.set()
+        if self._watch_id is not None:
+            self.registry.client.cancel_watch(self._watch_id)
+        self.registry.shutdown()
+
+
+class SharedRegistry:
+    def __init__(self, path: str = None):
+        """
+        Read-only view of the registry snapshot shared by all gateway workers.
+        Writes go to etcd through a client opened for that write and closed
+        after it, so idle workers hold no etcd connections.
+
+        :param path: Snapshot file path written by RegistrySnapshotWriter
+        """
+        self.path = path or os.getenv('REGISTRY_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH)
+        # A snapshot older than this means the writer has stopped refreshing it
+        self.max_age = float(os.getenv('REGISTRY_SNAPSHOT_MAX_AGE',
+                                       3 * float(os.getenv('REGISTRY_SNAPSHOT_INTERVAL', 5))))
+        self.logger = logging.getLogger(__name__)
+        self._stat_key = None
+        self._services = {}
+        self._updated_at = None
+
+    @contextmanager
+    def _write_client(self) -> Iterator[ServiceRegistry]:
+        """
+        An etcd client for a single write, closed once the write is done
+        """
+        registry = ServiceRegistry()
+        try:
+            yield registry
+        finally:
+            registry.shutdown()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the snapshot services, re-parsing only when the file was replaced
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.logger.warning(f"Registry snapshot {self.path} does not exist yet")
+            return {}
+
+        stat_key = (stat.st_ino, stat.st_mtime_ns)
+        if stat_key != self._stat_key:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            self._services = snapshot["services"]
+            self._updated_at = snapshot["updated_at"]
+            self._stat_key = stat_key
+        return self._services
+
+    def is_fresh(self) -> bool:
+        """
+        Whether the snapshot writer refreshed the snapshot within max_age
+        """
+        self._load()
+        return self._updated_at is not None and time.time() - self._updated_at <= self.max_age
+
+    def discover_service(self, service_name: str) -> Dict[str, Any]:
+        """
+        Discover available instances of a service from the snapshot
+
+        :param service_name: Name of the service to discover
+        :return: Dictionary of available service instances
+        """
+        services = dict(self._load().get(service_name, {}))
+        if not services:
+            self.logger.warning(f"No instances found for service: {service_name}")
+        return services
+
+    def list_all_services(self) -> Dict[str, Dict[str, Any]]:
+        """
+        List all registered services from the snapshot
+
+        :return: Dictionary mapping service name to its instances
+        """
+        return {name: dict(instances) for name, instances in self._load().items()}
+
+    def register_service(self, service_name: str, host: str, port: int, metadata: Dict[str, Any] = None,
+                         ttl: int = None):
+        with self._write_client() as registry:
+            registry.register_service(service_name, host, port, metadata, ttl)
+
+    def register_services(self, instances: List[Dict[str, Any]]):
+        with self._write_client() as registry:
+            registry.register_services(instances)
+
+    def deregister_service(self, service_name: str, host: str, port: int):
+        with self._write_client() as registry:
+            registry.deregister_service(service_name, host, port)
+
+    def deregister_services(self, instances: List[Dict[str, Any]]):
+        with self._write_client() as registry:
+            registry.deregister_services(instances)
+
+    def shutdown(self):
+        """
+        Nothing to release; every write closes its own etcd client
+        """
+
+
+if __name__ == '__main__':
+    RegistrySnapshotWriter().run()
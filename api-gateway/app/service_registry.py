@@ -1,8 +1,12 @@
 import os
+import time
 import etcd3
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+# etcd rejects transactions with more operations than --max-txn-ops (default 128)
+MAX_TXN_OPS = int(os.getenv('ETCD_MAX_TXN_OPS', 128))
 
 class ServiceRegistry:
     def __init__(self, host: str = None, port: int = None):
@@ -26,7 +30,8 @@ class ServiceRegistry:
             logging.error(f"Failed to connect to etcd: {e}")
             raise
 
-    def register_service(self, service_name: str, host: str, port: int, metadata: Dict[str, Any] = None):
+    def register_service(self, service_name: str, host: str, port: int, metadata: Dict[str, Any] = None,
+                         ttl: int = None):
         """
         Register a microservice in etcd
 
@@ -34,23 +39,47 @@ class ServiceRegistry:
         :param host: Service host
         :param port: Service port
         :param metadata: Additional service metadata
+        :param ttl: Seconds until the registration expires unless renewed, None to keep it
         """
-        service_key = f"/services/{service_name}/{host}:{port}"
-        service_info = {
-            "name": service_name,
-            "host": host,
-            "port": port,
-            "metadata": metadata or {},
-            "last_heartbeat": time.time()
-        }
+        service_key = self._service_key(service_name, host, port)
+        service_info = self._service_info(service_name, host, port, metadata)
 
         try:
-            self.client.put(service_key, json.dumps(service_info))
+            # Each renewal attaches the key to a fresh lease; the previous one expires unused
+            lease = self.client.lease(ttl) if ttl else None
+            self.client.put(service_key, json.dumps(service_info), lease=lease)
             self.logger.info(f"Registered service: {service_name} at {host}:{port}")
         except Exception as e:
             self.logger.error(f"Failed to register service {service_name}: {e}")
             raise
 
+    def register_services(self, instances: List[Dict[str, Any]]):
+        """
+        Register many service instances in one etcd transaction per MAX_TXN_OPS
+        instances. Batches larger than that are applied in several transactions,
+        so a failure can leave the earlier chunks applied.
+
+        :param instances: List of dicts with name, host, port and optional metadata
+        """
+        # etcd rejects a transaction that touches the same key twice; the last entry wins
+        puts = {}
+        for instance in instances:
+            service_key = self._service_key(instance['name'], instance['host'], instance['port'])
+            puts[service_key] = self._service_info(
+                instance['name'], instance['host'], instance['port'], instance.get('metadata')
+            )
+        operations = [
+            self.client.transactions.put(service_key, json.dumps(service_info))
+            for service_key, service_info in puts.items()
+        ]
+
+        try:
+            self._commit(operations)
+            self.logger.info(f"Registered {len(operations)} service instances")
+        except Exception as e:
+            self.logger.error(f"Failed to register service instances: {e}")
+            raise
+
     def discover_service(self, service_name: str) -> Dict[str, Any]:
         """
         Discover available instances of a service
@@ -82,7 +111,7 @@ class ServiceRegistry:
         :param host: Service host
         :param port: Service port
         """
-        service_key = f"/services/{service_name}/{host}:{port}"
+        service_key = self._service_key(service_name, host, port)
 
         try:
             self.client.delete(service_key)
@@ -91,11 +120,32 @@ class ServiceRegistry:
             self.logger.error(f"Failed to deregister service {service_name}: {e}")
             raise
 
-    def list_all_services(self) -> Dict[str, Any]:
+    def deregister_services(self, instances: List[Dict[str, Any]]):
+        """
+        Remove many service instances from the registry in one etcd transaction
+        per MAX_TXN_OPS instances, with the same partial-failure caveat as
+        register_services
+
+        :param instances: List of dicts with name, host and port
+        """
+        service_keys = dict.fromkeys(
+            self._service_key(instance['name'], instance['host'], instance['port'])
+            for instance in instances
+        )
+        operations = [self.client.transactions.delete(service_key) for service_key in service_keys]
+
+        try:
+            self._commit(operations)
+            self.logger.info(f"Deregistered {len(operations)} service instances")
+        except Exception as e:
+            self.logger.error(f"Failed to deregister service instances: {e}")
+            raise
+
+    def list_all_services(self) -> Dict[str, Dict[str, Any]]:
         """
-        List all registered services in the registry
+        List all registered services in the registry with a single range read
 
-        :return: Dictionary of all services and their instances
+        :return: Dictionary mapping service name to its instances, keyed by etcd key
         """
         services = {}
 
@@ -103,13 +153,47 @@ class ServiceRegistry:
             for result in self.client.get_prefix("/services/"):
                 key = result[1].key.decode('utf-8')
                 value = json.loads(result[0].decode('utf-8'))
-                services[key] = value
+                services.setdefault(value['name'], {})[key] = value
 
             return services
         except Exception as e:
-            self.logger.error("Failed to list all services: {e}")
+            self.logger.error(f"Failed to list all services: {e}")
             raise
 
+    @staticmethod
+    def _service_key(service_name: str, host: str, port: int) -> str:
+        return f"/services/{service_name}/{host}:{port}"
+
+    @staticmethod
+    def _service_info(service_name: str, host: str, port: int, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        return {
+            "name": service_name,
+            "host": host,
+            "port": port,
+            "metadata": metadata or {},
+            "last_heartbeat": time.time()
+        }
+
+    def _commit(self, operations: List[Any]):
+        """
+        Apply a list of etcd operations in chunks of MAX_TXN_OPS. Each chunk is
+        atomic; chunks applied before a failing one are not rolled back.
+
+        :param operations: etcd transaction put/delete requests
+        """
+        for start in range(0, len(operations), MAX_TXN_OPS):
+            chunk = operations[start:start + MAX_TXN_OPS]
+            try:
+                succeeded, _ = self.client.transaction(compare=[], success=chunk, failure=[])
+                if not succeeded:
+                    raise RuntimeError("etcd transaction was not applied")
+            except Exception:
+                self.logger.error(
+                    f"Transaction for operations {start}-{start + len(chunk) - 1} of {len(operations)} failed; "
+                    f"{start} operations were already applied"
+                )
+                raise
+
     def shutdown(self):
         """
         Gracefully shut down the service registry client
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('API_GATEWAY_PORT', 8000)}"
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers overlap upstream calls; the balancer's in-flight limits are per worker
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Workers inherit this and use it to report readiness for the whole gateway
+readiness_dir = os.getenv('READINESS_DIR', '/dev/shm/api-gateway-ready')
+os.environ['READINESS_DIR'] = readiness_dir
+
+_snapshot_writer = None
+_stopping = threading.Event()
+
+
+def _supervise_snapshot_writer(server):
+    """
+    Keep the snapshot writer running, restarting it whenever it exits
+    """
+    global _snapshot_writer
+    while not _stopping.is_set():
+        _snapshot_writer = subprocess.Popen(
+            [sys.executable, '-m', 'app.registry_snapshot'],
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        server.log.info(f"Started registry snapshot writer (pid: {_snapshot_writer.pid})")
+        returncode = _snapshot_writer.wait()
+        if not _stopping.is_set():
+            server.log.error(f"Registry snapshot writer exited with {returncode}, restarting")
+            time.sleep(1)
+
+
+def on_starting(server):
+    """
+    Clear readiness markers left by a previous run, and start one registry
+    snapshot writer per gateway so etcd connections and watches do not
+    scale with the worker count
+    """
+    os.makedirs(readiness_dir, exist_ok=True)
+    for marker in os.listdir(readiness_dir):
+        os.unlink(os.path.join(readiness_dir, marker))
+
+    if not os.getenv('REGISTRY_SNAPSHOT_PATH'):
+        return
+    threading.Thread(
+        target=_supervise_snapshot_writer, args=(server,), name="snapshot-writer-supervisor", daemon=True
+    ).start()
+
+
+def when_ready(server):
+    """
+    Tell workers how many siblings /readyz should wait for. Runs before the
+    first fork, and server.cfg.workers includes any -w/--workers override.
+    """
+    os.environ['GATEWAY_WORKERS'] = str(server.cfg.workers)
+
+
+def post_worker_init(worker):
+    """
+    Warm up each worker in the background; /readyz reports when it is done
+    """
+    from app.api_gateway import start_warm_up
+    start_warm_up()
+
+
+def child_exit(server, worker):
+    """
+    A replacement worker starts cold, so the gateway is not ready until it warms up
+    """
+    try:
+        os.unlink(os.path.join(readiness_dir, str(worker.pid)))
+    except FileNotFoundError:
+        pass
+
+
+def on_exit(server):
+    _stopping.set()
+    if _snapshot_writer is not None:
+        _snapshot_writer.terminate()
+        _snapshot_writer.wait()
@@ -1,26 +1,18 @@
-from flask import Flask
 from werkzeug.exceptions import NotFound
-import os
-import json
-from flask import make_response
+from service_runtime import Service, wants_protobuf, cinema_pb2
 
-def root_dir():
-    """Returns the root directory for this project."""
-    return os.path.dirname(os.path.abspath(__file__))
+service = Service("bookings", port=5003, import_name=__name__)
+app = service.app
+nice_json = service.nice_json
+protobuf_response = service.protobuf_response
 
-def nice_json(arg):
-    response = make_response(json.dumps(arg, sort_keys=True, indent=4))
-    response.headers['Content-type'] = "application/json"
-    return response
+bookings = service.load_dataset("bookings.json")
 
-app = Flask(__name__)
 
-# Construct the path to the JSON file
-json_file_path = os.path.join(root_dir(), "database/bookings.json")
-
-# Open and load the JSON file
-with open(json_file_path, "r") as f:
-    bookings = json.load(f)
+def bookings_message(user_bookings):
+    return cinema_pb2.Bookings(
+        dates={date: cinema_pb2.MovieIds(ids=ids) for date, ids in user_bookings.items()}
+    )
 
 
 @app.route("/", methods=['GET'])
@@ -31,12 +23,16 @@ def hello():
             "bookings": "/bookings",
             "booking": "/bookings/<username>"
         }
-    })
+    }, cache_key="/")
 
 
 @app.route("/bookings", methods=['GET'])
 def booking_list():
-    return nice_json(bookings)
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.AllBookings(
+            users={username: bookings_message(b) for username, b in bookings.items()}
+        ), cache_key="/bookings")
+    return nice_json(bookings, cache_key="/bookings")
 
 
 @app.route("/bookings/<username>", methods=['GET'])
@@ -44,8 +40,9 @@ def booking_record(username):
     if username not in bookings:
         raise NotFound
 
-    return nice_json(bookings[username])
+    if wants_protobuf():
+        return protobuf_response(lambda: bookings_message(bookings[username]), cache_key=username)
+    return nice_json(bookings[username], cache_key=username)
 
 if __name__ == "__main__":
-    app.run(port=5003, debug=True)
-
+    service.run()
@@ -1,26 +1,12 @@
-from flask import Flask
 from werkzeug.exceptions import NotFound
-import os
-import json
-from flask import make_response
+from service_runtime import Service, wants_protobuf, cinema_pb2
 
-def root_dir():
-    """Returns the root directory for this project."""
-    return os.path.dirname(os.path.abspath(__file__))
+service = Service("movies", port=5001, import_name=__name__)
+app = service.app
+nice_json = service.nice_json
+protobuf_response = service.protobuf_response
 
-def nice_json(arg):
-    response = make_response(json.dumps(arg, sort_keys=True, indent=4))
-    response.headers['Content-type'] = "application/json"
-    return response
-
-app = Flask(__name__)
-
-# Construct the path to the JSON file
-json_file_path = os.path.join(root_dir(), "database/movies.json")
-
-# Open and load the JSON file
-with open(json_file_path, "r") as f:
-    movies = json.load(f)
+movies = service.load_dataset("movies.json")
 
 
 @app.route("/", methods=['GET'])
@@ -31,24 +17,30 @@ def hello():
             "movies": "/movies",
             "movie": "/movies/<id>"
         }
-    })
+    }, cache_key="/")
 
 @app.route("/movies/<movieid>", methods=['GET'])
 def movie_info(movieid):
     if movieid not in movies:
         raise NotFound
 
-    result = movies[movieid]
+    # Copy the record so the dataset (and the cached /movies body) is never modified
+    result = dict(movies[movieid])
     result["uri"] = "/movies/{}".format(movieid)
 
-    return nice_json(result)
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.Movie(**result), cache_key=movieid)
+    return nice_json(result, cache_key=movieid)
 
 
 @app.route("/movies", methods=['GET'])
 def movie_record():
-    return nice_json(movies)
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.Movies(
+            movies={movieid: cinema_pb2.Movie(**movie) for movieid, movie in movies.items()}
+        ), cache_key="/movies")
+    return nice_json(movies, cache_key="/movies")
 
 
 if __name__ == "__main__":
-    app.run(port=5001, debug=True)
-
+    service.run()
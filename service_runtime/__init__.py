@@ -0,0 +1,4 @@
+from .runtime import Service
+from .tracing import phase, outgoing_headers
+from .grpc_transport import GrpcClient, wants_protobuf
+from . import cinema_pb2
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: cinema.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0c\x63inema.proto\x12\x06\x63inema\"\xab\x01\n\x0bHttpRequest\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\r\n\x05query\x18\x03 \x01(\t\x12\x31\n\x07headers\x18\x04 \x03(\x0b\x32 .cinema.HttpRequest.HeadersEntry\x12\x0c\n\x04\x62ody\x18\x05 \x01(\x0c\x1a.\n\x0cHeadersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x90\x01\n\x0cHttpResponse\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\x32\n\x07headers\x18\x02 \x03(\x0b\x32!.cinema.HttpResponse.HeadersEntry\x12\x0c\n\x04\x62ody\x18\x03 \x01(\x0c\x1a.\n\x0cHeadersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"Q\n\x05Movie\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0e\n\x06rating\x18\x03 \x01(\x01\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0b\n\x03uri\x18\x05 \x01(\t\"r\n\x06Movies\x12*\n\x06movies\x18\x01 \x03(\x0b\x32\x1a.cinema.Movies.MoviesEntry\x1a<\n\x0bMoviesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1c\n\x05value\x18\x02 \x01(\x0b\x32\r.cinema.Movie:\x02\x38\x01\"\x17\n\x08MovieIds\x12\x0b\n\x03ids\x18\x01 \x03(\t\"\x84\x01\n\tShowtimes\x12\x33\n\tshowtimes\x18\x01 \x03(\x0b\x32 .cinema.Showtimes.ShowtimesEntry\x1a\x42\n\x0eShowtimesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1f\n\x05value\x18\x02 \x01(\x0b\x32\x10.cinema.MovieIds:\x02\x38\x01\"v\n\x08\x42ookings\x12*\n\x05\x64\x61tes\x18\x01 \x03(\x0b\x32\x1b.cinema.Bookings.DatesEntry\x1a>\n\nDatesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1f\n\x05value\x18\x02 \x01(\x0b\x32\x10.cinema.MovieIds:\x02\x38\x01\"|\n\x0b\x41llBookings\x12-\n\x05users\x18\x01 \x03(\x0b\x32\x1e.cinema.AllBookings.UsersEntry\x1a>\n\nUsersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1f\n\x05value\x18\x02 \x01(\x0b\x32\x10.cinema.Bookings:\x02\x38\x01\"5\n\x04User\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0blast_active\x18\x03 \x01(\x03\"l\n\x05Users\x12\'\n\x05users\x18\x01 \x03(\x0b\x32\x18.cinema.Users.UsersEntry\x1a:\n\nUsersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1b\n\x05value\x18\x02 \x01(\x0b\x32\x0c.cinema.User:\x02\x38\x01\x32?\n\x07\x42\x61\x63kend\x12\x34\n\x07\x46orward\x12\x13.cinema.HttpRequest\x1a\x14.cinema.HttpResponseb\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'cinema_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _HTTPREQUEST_HEADERSENTRY._options = None
+  _HTTPREQUEST_HEADERSENTRY._serialized_options = b'8\001'
+  _HTTPRESPONSE_HEADERSENTRY._options = None
+  _HTTPRESPONSE_HEADERSENTRY._serialized_options = b'8\001'
+  _MOVIES_MOVIESENTRY._options = None
+  _MOVIES_MOVIESENTRY._serialized_options = b'8\001'
+  _SHOWTIMES_SHOWTIMESENTRY._options = None
+  _SHOWTIMES_SHOWTIMESENTRY._serialized_options = b'8\001'
+  _BOOKINGS_DATESENTRY._options = None
+  _BOOKINGS_DATESENTRY._serialized_options = b'8\001'
+  _ALLBOOKINGS_USERSENTRY._options = None
+  _ALLBOOKINGS_USERSENTRY._serialized_options = b'8\001'
+  _USERS_USERSENTRY._options = None
+  _USERS_USERSENTRY._serialized_options = b'8\001'
+  _HTTPREQUEST._serialized_start=25
+  _HTTPREQUEST._serialized_end=196
+  _HTTPREQUEST_HEADERSENTRY._serialized_start=150
+  _HTTPREQUEST_HEADERSENTRY._serialized_end=196
+  _HTTPRESPONSE._serialized_start=199
+  _HTTPRESPONSE._serialized_end=343
+  _HTTPRESPONSE_HEADERSENTRY._serialized_start=150
+  _HTTPRESPONSE_HEADERSENTRY._serialized_end=196
+  _MOVIE._serialized_start=345
+  _MOVIE._serialized_end=426
+  _MOVIES._serialized_start=428
+  _MOVIES._serialized_end=542
+  _MOVIES_MOVIESENTRY._serialized_start=482
+  _MOVIES_MOVIESENTRY._serialized_end=542
+  _MOVIEIDS._serialized_start=544
+  _MOVIEIDS._serialized_end=567
+  _SHOWTIMES._serialized_start=570
+  _SHOWTIMES._serialized_end=702
+  _SHOWTIMES_SHOWTIMESENTRY._serialized_start=636
+  _SHOWTIMES_SHOWTIMESENTRY._serialized_end=702
+  _BOOKINGS._serialized_start=704
+  _BOOKINGS._serialized_end=822
+  _BOOKINGS_DATESENTRY._serialized_start=760
+  _BOOKINGS_DATESENTRY._serialized_end=822
+  _ALLBOOKINGS._serialized_start=824
+  _ALLBOOKINGS._serialized_end=948
+  _ALLBOOKINGS_USERSENTRY._serialized_start=886
+  _ALLBOOKINGS_USERSENTRY._serialized_end=948
+  _USER._serialized_start=950
+  _USER._serialized_end=1003
+  _USERS._serialized_start=1005
+  _USERS._serialized_end=1113
+  _USERS_USERSENTRY._serialized_start=1055
+  _USERS_USERSENTRY._serialized_end=1113
+  _BACKEND._serialized_start=1115
+  _BACKEND._serialized_end=1178
+# @@protoc_insertion_point(module_scope)
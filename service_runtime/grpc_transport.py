@@ -0,0 +1,104 @@
+import os
+from concurrent import futures
+
+import grpc
+from flask import request
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from . import cinema_pb2
+
+PROTOBUF_MIMETYPE = "application/x-protobuf"
+FORWARD_METHOD = "/cinema.Backend/Forward"
+
+
+def serve_grpc(app, port=None, max_workers=None):
+    """
+    Serve app's routes over gRPC so callers can multiplex many requests on
+    one HTTP/2 connection. Does nothing unless a port is given or GRPC_PORT is set.
+    Each server worker may call this: gRPC binds with SO_REUSEPORT, so the
+    kernel spreads connections across the worker processes.
+
+    :param app: Flask application to expose
+    :param port: Port for the gRPC server
+    :param max_workers: Threads handling concurrent streams
+    :return: The started grpc.Server, or None
+    """
+    port = port or os.getenv("GRPC_PORT")
+    if not port:
+        return None
+
+    def forward(http_request, context):
+        builder = EnvironBuilder(
+            path=http_request.path,
+            method=http_request.method,
+            query_string=http_request.query,
+            headers=dict(http_request.headers),
+            data=http_request.body
+        )
+        app_iter, status, headers = run_wsgi_app(app, builder.get_environ(), buffered=True)
+        try:
+            body = b"".join(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+        return cinema_pb2.HttpResponse(
+            status=int(status.split(" ", 1)[0]),
+            headers={key: ", ".join(headers.getlist(key)) for key in headers.keys()},
+            body=body
+        )
+
+    handler = grpc.method_handlers_generic_handler("cinema.Backend", {
+        "Forward": grpc.unary_unary_rpc_method_handler(
+            forward,
+            request_deserializer=cinema_pb2.HttpRequest.FromString,
+            response_serializer=cinema_pb2.HttpResponse.SerializeToString
+        )
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(
+        max_workers=max_workers or int(os.getenv("GRPC_WORKERS", 16))
+    ))
+    server.add_generic_rpc_handlers((handler,))
+    server.add_insecure_port("[::]:{}".format(port))
+    server.start()
+    return server
+
+
+class GrpcClient:
+    def __init__(self, target):
+        """
+        One multiplexed channel to a service's gRPC port, shared by all threads.
+        The channel is opened on first use so it is never inherited across a fork.
+
+        :param target: host:port of the service's gRPC server
+        """
+        self.target = target
+        self._pid = None
+        self._forward = None
+
+    def _forwarder(self):
+        if self._pid != os.getpid():
+            self._forward = grpc.insecure_channel(self.target).unary_unary(
+                FORWARD_METHOD,
+                request_serializer=cinema_pb2.HttpRequest.SerializeToString,
+                response_deserializer=cinema_pb2.HttpResponse.FromString
+            )
+            self._pid = os.getpid()
+        return self._forward
+
+    def get(self, path, headers=None, timeout=5):
+        """
+        GET path from the service, asking for the protobuf encoding
+
+        :return: cinema_pb2.HttpResponse
+        """
+        headers = dict(headers or {})
+        headers["Accept"] = PROTOBUF_MIMETYPE
+        return self._forwarder()(
+            cinema_pb2.HttpRequest(method="GET", path=path, headers=headers),
+            timeout=timeout
+        )
+
+
+def wants_protobuf():
+    """Whether the current request asked for the protobuf encoding."""
+    return PROTOBUF_MIMETYPE in request.headers.get("Accept", "")
@@ -0,0 +1,35 @@
+import os
+import sys
+import json
+import time
+import logging
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def heartbeat(gateway_url, registration, interval):
+    """
+    Register with the gateway, then re-register every interval so the
+    registration's lease is renewed before its ttl runs out. Failed attempts
+    are retried with backoff capped at interval. Returns once the parent
+    process has exited, so an orphaned heartbeat never outlives its service.
+    """
+    parent = os.getppid()
+    delay = 1
+    while os.getppid() == parent:
+        try:
+            requests.post("{}/register".format(gateway_url), json=registration,
+                          timeout=5).raise_for_status()
+            delay = 1
+            time.sleep(interval)
+        except requests.RequestException as e:
+            logger.warning("Failed to register {} with the gateway: {}".format(registration["name"], e))
+            time.sleep(delay)
+            delay = min(delay * 2, interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    heartbeat(sys.argv[1], json.loads(sys.argv[2]), float(sys.argv[3]))
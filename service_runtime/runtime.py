@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import hashlib
+import atexit
+import socket
+import logging
+import subprocess
+import multiprocessing
+from datetime import datetime, timezone
+
+import requests
+from flask import Flask, make_response, request
+from werkzeug.http import is_resource_modified
+
+from .tracing import init_tracing
+from .grpc_transport import serve_grpc, PROTOBUF_MIMETYPE
+
+logger = logging.getLogger(__name__)
+
+
+class Service:
+    def __init__(self, name, port, import_name):
+        """
+        Runtime shared by the cinema services. Each service creates one,
+        loads its dataset and declares its routes on service.app.
+
+        :param name: Service name, as routed by the gateway
+        :param port: Default HTTP port, overridden by PORT
+        :param import_name: The service module's __name__, used to locate its files
+        """
+        self.name = name
+        self.port = int(os.getenv("PORT", port))
+        self.app = Flask(import_name)
+        self.metrics_hooks = []
+        self._json_cache = {}
+        self._protobuf_cache = {}
+        self._grpc_server = None
+        self._heartbeat = None
+        self._dataset_hash = hashlib.sha1()
+        self.dataset_version = self._dataset_hash.hexdigest()
+        self.last_modified = None
+        init_tracing(self.app, name, self.metrics_hooks)
+
+    def load_dataset(self, filename):
+        """
+        Load a JSON dataset from the service's database directory, falling
+        back to the service directory itself when running from a checkout.
+        Folds the file into dataset_version and last_modified, which the
+        ETag and Last-Modified validators are derived from.
+        """
+        for path in (os.path.join(self.app.root_path, "database", filename),
+                     os.path.join(self.app.root_path, filename)):
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    content = f.read()
+                self._dataset_hash.update(content)
+                self.dataset_version = self._dataset_hash.hexdigest()
+                modified = datetime.fromtimestamp(int(os.path.getmtime(path)), timezone.utc)
+                self.last_modified = max(self.last_modified or modified, modified)
+                return json.loads(content)
+        raise FileNotFoundError("Dataset {} does not exist.".format(filename))
+
+    def etag(self, cache_key, representation="json"):
+        """
+        Strong ETag for one representation of a cached resource. It only
+        changes when a dataset changes, so it is known before serializing.
+        """
+        key = "{}:{}:{}".format(self.dataset_version, representation, cache_key)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _conditional(self, cache_key, representation):
+        """
+        The ETag for this resource, and a 304 response when the client's
+        If-None-Match or If-Modified-Since shows it is already current.
+        """
+        etag = self.etag(cache_key, representation)
+        if is_resource_modified(request.environ, etag=etag, last_modified=self.last_modified):
+            return etag, None
+        return etag, self._validated(make_response("", 304), etag)
+
+    def _validated(self, response, etag):
+        response.set_etag(etag)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        # JSON and protobuf representations share a URL
+        response.vary.add("Accept")
+        return response
+
+    def nice_json(self, arg, cache_key=None):
+        """
+        JSON response for arg. Pass a cache_key for data that never changes
+        after load so it is serialized only once per process and served with
+        ETag/Last-Modified validators, answering 304 when they match.
+        """
+        if cache_key is None:
+            response = make_response(json.dumps(arg, sort_keys=True, indent=4))
+            response.headers['Content-type'] = "application/json"
+            return response
+
+        etag, not_modified = self._conditional(cache_key, "json")
+        if not_modified is not None:
+            return not_modified
+
+        body = self._json_cache.get(cache_key)
+        if body is None:
+            body = self._json_cache[cache_key] = json.dumps(arg, sort_keys=True, indent=4)
+        response = make_response(body)
+        response.headers['Content-type'] = "application/json"
+        return self._validated(response, etag)
+
+    def protobuf_response(self, build, cache_key):
+        """
+        Protobuf response for a cached resource; build returns the message
+        and is only called the first time the resource is served.
+        """
+        etag, not_modified = self._conditional(cache_key, "protobuf")
+        if not_modified is not None:
+            return not_modified
+
+        body = self._protobuf_cache.get(cache_key)
+        if body is None:
+            body = self._protobuf_cache[cache_key] = build().SerializeToString()
+        response = make_response(body)
+        response.headers['Content-type'] = PROTOBUF_MIMETYPE
+        return self._validated(response, etag)
+
+    def add_metrics_hook(self, hook):
+        """
+        Call hook with every finished request span (service, name, status,
+        duration_ms and phases).
+        """
+        self.metrics_hooks.append(hook)
+        return hook
+
+    def registration(self):
+        """The instance record sent to the gateway's /register endpoint."""
+        metadata = {
+            "grpc_port": int(os.getenv("GRPC_PORT")) if os.getenv("GRPC_PORT") else None,
+            "zone": os.getenv("SERVICE_ZONE"),
+            "rack": os.getenv("SERVICE_RACK"),
+            "version": os.getenv("SERVICE_VERSION"),
+            "canary": os.getenv("SERVICE_CANARY") == "true" or None
+        }
+        return {
+            "name": self.name,
+            "host": os.getenv("SERVICE_HOST", socket.gethostname()),
+            "port": self.port,
+            "metadata": {key: value for key, value in metadata.items() if value is not None}
+        }
+
+    def register(self):
+        """
+        Register this instance with the gateway at GATEWAY_URL, if set. A
+        heartbeat subprocess re-registers it every REGISTER_INTERVAL seconds
+        under an etcd lease of REGISTER_TTL seconds (three intervals by
+        default), so an instance that dies without deregistering expires.
+        It runs outside the gunicorn master, which forks the workers.
+        """
+        gateway_url = os.getenv("GATEWAY_URL")
+        if not gateway_url:
+            return
+        interval = float(os.getenv("REGISTER_INTERVAL", 30))
+        registration = dict(self.registration(), ttl=int(os.getenv("REGISTER_TTL", 3 * interval)))
+        self._heartbeat = subprocess.Popen(
+            [sys.executable, "-m", "{}.heartbeat".format(__package__),
+             gateway_url, json.dumps(registration), str(interval)],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+
+    def deregister(self):
+        gateway_url = os.getenv("GATEWAY_URL")
+        if not gateway_url:
+            return
+        # Stop the heartbeat first so it cannot re-register this instance
+        if self._heartbeat is not None:
+            self._heartbeat.terminate()
+            self._heartbeat.wait()
+        registration = self.registration()
+        try:
+            requests.post("{}/unregister".format(gateway_url), json={
+                "name": registration["name"],
+                "host": registration["host"],
+                "port": registration["port"]
+            }, timeout=5)
+        except requests.RequestException as e:
+            logger.warning("Failed to deregister {} from the gateway: {}".format(self.name, e))
+
+    def server_options(self):
+        """
+        gunicorn settings. Defaults to 2 * CPUs + 1 worker processes, each
+        with threads for the I/O-bound calls between services, and keeps
+        connections from the gateway alive between requests.
+        """
+        return {
+            "bind": "0.0.0.0:{}".format(self.port),
+            "workers": int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)),
+            "threads": int(os.getenv("WEB_THREADS", 4)),
+            "worker_class": "gthread",
+            "keepalive": int(os.getenv("WEB_KEEPALIVE", 5)),
+            "when_ready": lambda server: self.register(),
+            "on_exit": lambda server: self.deregister(),
+            "post_worker_init": lambda worker: self._start_grpc()
+        }
+
+    def _start_grpc(self):
+        self._grpc_server = serve_grpc(self.app)
+
+    def run(self):
+        """
+        Serve with gunicorn. SERVICE_DEBUG=true runs the Flask debug server
+        instead, for local development only.
+        """
+        if os.getenv("SERVICE_DEBUG") == "true":
+            self.register()
+            atexit.register(self.deregister)
+            self._start_grpc()
+            self.app.run(port=self.port, debug=True, use_reloader=self._grpc_server is None)
+            return
+
+        from gunicorn.app.base import BaseApplication
+
+        service = self
+
+        class ServiceApplication(BaseApplication):
+            def load_config(self):
+                for key, value in service.server_options().items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return service.app
+
+        ServiceApplication().run()
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from flask import g, request
+
+# Finished spans are appended here as JSON lines when set
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH')
+
+_export_lock = threading.Lock()
+
+
+def _parse_traceparent(value):
+    """
+    Extract the trace id and parent span id from a W3C traceparent header
+    """
+    parts = (value or '').split('-')
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None, None
+
+
+def init_tracing(app, service_name, hooks=None):
+    """
+    Open a span for every request handled by app and close it with
+    Server-Timing, traceparent and X-Request-ID response headers
+
+    :param app: Flask application to instrument
+    :param service_name: Name recorded on spans and Server-Timing metrics
+    :param hooks: Callables given each finished span, e.g. to record metrics
+    """
+    @app.before_request
+    def start_span():
+        trace_id, parent_id = _parse_traceparent(request.headers.get('traceparent'))
+        g.trace = {
+            "trace_id": trace_id or uuid.uuid4().hex,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent_id,
+            "request_id": request.headers.get('X-Request-ID') or uuid.uuid4().hex,
+            "service": service_name,
+            "name": f"{request.method} {request.path}",
+            "start": time.time(),
+            "phases": []
+        }
+        g.trace_started = time.perf_counter()
+
+    @app.after_request
+    def finish_span(response):
+        trace = g.get('trace')
+        if trace is None:
+            return response
+
+        trace["duration_ms"] = (time.perf_counter() - g.trace_started) * 1000
+        trace["status"] = response.status_code
+
+        timings = [f"{service_name}-{p['name']};dur={p['duration_ms']:.2f}" for p in trace["phases"]]
+        timings.append(f"{service_name};dur={trace['duration_ms']:.2f}")
+        response.headers.add('Server-Timing', ', '.join(timings))
+        response.headers['X-Request-ID'] = trace["request_id"]
+        response.headers['traceparent'] = f"00-{trace['trace_id']}-{trace['span_id']}-01"
+
+        export_span(trace)
+        for hook in hooks or ():
+            hook(trace)
+        return response
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a block of work as a named phase of the current request's span
+
+    :param name: Phase name, e.g. "registry" or "bookings"
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = g.get('trace')
+        if trace is not None:
+            trace["phases"].append({
+                "name": name,
+                "duration_ms": (time.perf_counter() - started) * 1000
+            })
+
+
+def outgoing_headers():
+    """
+    Headers that propagate the current trace to a downstream call
+    """
+    trace = g.get('trace')
+    if trace is None:
+        return {}
+    return {
+        "X-Request-ID": trace["request_id"],
+        "traceparent": f"00-{trace['trace_id']}-{trace['span_id']}-01"
+    }
+
+
+def export_span(trace):
+    """
+    Append a finished span to TRACE_EXPORT_PATH as one JSON line
+    """
+    if not TRACE_EXPORT_PATH:
+        return
+    line = json.dumps(trace) + "\n"
+    with _export_lock:
+        with open(TRACE_EXPORT_PATH, 'a') as f:
+            f.write(line)
@@ -1,26 +1,12 @@
-from flask import Flask
 from werkzeug.exceptions import NotFound
-import os
-import json
-from flask import make_response
+from service_runtime import Service, wants_protobuf, cinema_pb2
 
-def root_dir():
-    """Returns the root directory for this project."""
-    return os.path.dirname(os.path.abspath(__file__))
+service = Service("showtimes", port=5002, import_name=__name__)
+app = service.app
+nice_json = service.nice_json
+protobuf_response = service.protobuf_response
 
-def nice_json(arg):
-    response = make_response(json.dumps(arg, sort_keys=True, indent=4))
-    response.headers['Content-type'] = "application/json"
-    return response
-
-app = Flask(__name__)
-
-# Construct the path to the JSON file
-json_file_path = os.path.join(root_dir(), "database/showtimes.json")
-
-# Open and load the JSON file
-with open(json_file_path, "r") as f:
-    showtimes = json.load(f)
+showtimes = service.load_dataset("showtimes.json")
 
 
 @app.route("/", methods=['GET'])
@@ -31,20 +17,25 @@ def hello():
             "showtimes": "/showtimes",
             "showtime": "/showtimes/<date>"
         }
-    })
+    }, cache_key="/")
 
 
 @app.route("/showtimes", methods=['GET'])
 def showtimes_list():
-    return nice_json(showtimes)
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.Showtimes(
+            showtimes={date: cinema_pb2.MovieIds(ids=ids) for date, ids in showtimes.items()}
+        ), cache_key="/showtimes")
+    return nice_json(showtimes, cache_key="/showtimes")
 
 
 @app.route("/showtimes/<date>", methods=['GET'])
 def showtimes_record(date):
     if date not in showtimes:
         raise NotFound
-    print(showtimes[date])
-    return nice_json(showtimes[date])
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.MovieIds(ids=showtimes[date]), cache_key=date)
+    return nice_json(showtimes[date], cache_key=date)
 
 if __name__ == "__main__":
-    app.run(port=5002, debug=True)
+    service.run()
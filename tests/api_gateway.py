@@ -0,0 +1,101 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api-gateway"))
+
+from app import api_gateway
+from app.load_balancer import LocalityBalancer
+from app.grpc_transport import GrpcTransport
+
+SERVICES = {
+    "/services/users/users-{}:5000".format(i): {"name": "users", "host": "users-{}".format(i), "port": 5000}
+    for i in range(3)
+}
+
+
+def reply(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = b"{}"
+    return response
+
+
+class TestRouteRequest(unittest.TestCase):
+    def setUp(self):
+        registry = mock.Mock()
+        registry.discover_service.return_value = dict(SERVICES)
+        self.balancer = LocalityBalancer()
+        self.session = mock.Mock()
+        for name, value in (("_registry", registry), ("balancer", self.balancer), ("session", self.session)):
+            patcher = mock.patch.object(api_gateway, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = api_gateway.app.test_client()
+
+    def ejected(self):
+        return [key for key in SERVICES if key in self.balancer._ejected]
+
+    def test_application_503_passes_through(self):
+        """ A dependency outage reported as 503 does not eject or retry"""
+        self.session.request.return_value = reply(503)
+        self.assertEqual(self.client.get("/users/chris_rivers/bookings").status_code, 503)
+        self.assertEqual(self.session.request.call_count, 1)
+        self.assertEqual(self.ejected(), [])
+
+    def test_overloaded_instance_is_ejected_and_retried(self):
+        self.session.request.side_effect = [reply(503, {"Retry-After": "1"}), reply(429), reply(200)]
+        self.assertEqual(self.client.get("/users/chris_rivers").status_code, 200)
+        self.assertEqual(self.session.request.call_count, 3)
+        self.assertEqual(len(self.ejected()), 2)
+
+    def test_unsafe_methods_are_not_retried_on_overload(self):
+        self.session.request.return_value = reply(429)
+        self.assertEqual(self.client.post("/users/chris_rivers", json={}).status_code, 429)
+        self.assertEqual(self.session.request.call_count, 1)
+        self.assertEqual(len(self.ejected()), 1)
+
+    def test_connection_failure_tries_next_instance(self):
+        self.session.request.side_effect = [requests.ConnectionError("refused"), reply(200)]
+        self.assertEqual(self.client.get("/users/chris_rivers").status_code, 200)
+        self.assertEqual(len(self.ejected()), 1)
+
+
+class TestGrpcTransport(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("app.grpc_transport.grpc.insecure_channel")
+        self.insecure_channel = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.transport = GrpcTransport()
+
+    def forward(self, service_key, host, port=6000):
+        self.transport.forward(service_key, host, port, "GET", "/", "", {}, b"")
+
+    def test_channel_is_shared_per_instance(self):
+        self.forward("/services/users/users-0:5000", "users-0")
+        self.forward("/services/users/users-0:5000", "users-0")
+        self.insecure_channel.assert_called_once_with("users-0:6000")
+
+    def test_deregistered_instances_are_closed(self):
+        self.forward("/services/users/users-0:5000", "users-0")
+        self.forward("/services/users/gone:5000", "gone")
+        self.forward("/services/movies/movies-0:5001", "movies-0")
+        self.transport.prune(SERVICES)
+        self.assertEqual(sorted(self.transport._channels),
+                         ["/services/movies/movies-0:5001", "/services/users/users-0:5000"])
+        self.assertEqual(self.insecure_channel.return_value.close.call_count, 1)
+
+    def test_changed_port_replaces_channel(self):
+        self.forward("/services/users/users-0:5000", "users-0")
+        self.forward("/services/users/users-0:5000", "users-0", port=6001)
+        self.assertEqual(self.insecure_channel.call_count, 2)
+        self.assertEqual(self.insecure_channel.return_value.close.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api-gateway"))
+
+from app.load_balancer import LocalityBalancer
+
+
+def instance(host, **metadata):
+    key = "/services/movies/{}:5001".format(host)
+    return key, {"name": "movies", "host": host, "port": 5001, "metadata": metadata}
+
+
+class TestLocalityBalancer(unittest.TestCase):
+    def setUp(self):
+        self.balancer = LocalityBalancer(zone="a", rack="r1")
+        self.services = dict([
+            instance("remote", zone="b"),
+            instance("same-zone", zone="a", rack="r2"),
+            instance("same-rack", zone="a", rack="r1"),
+        ])
+
+    def hosts(self, candidates):
+        return [service_info["host"] for _, service_info in candidates]
+
+    def test_tier_ordering(self):
+        """ Same rack first, then same zone, then other zones"""
+        self.assertEqual(self.hosts(self.balancer.candidates(self.services)),
+                         ["same-rack", "same-zone", "remote"])
+
+    def test_ejected_instances_go_last(self):
+        self.balancer.eject("/services/movies/same-rack:5001")
+        self.assertEqual(self.hosts(self.balancer.candidates(self.services)),
+                         ["same-zone", "remote", "same-rack"])
+
+    def test_overloaded_instances_go_last(self):
+        balancer = LocalityBalancer(zone="a", rack="r1", max_in_flight=1)
+        with balancer.track("/services/movies/same-rack:5001"):
+            self.assertEqual(self.hosts(balancer.candidates(self.services)),
+                             ["same-zone", "remote", "same-rack"])
+        self.assertEqual(self.hosts(balancer.candidates(self.services))[0], "same-rack")
+
+    def test_canaries_excluded_without_version(self):
+        self.services.update([instance("canary", zone="a", rack="r1", canary=True, version="v2")])
+        self.assertNotIn("canary", self.hosts(self.balancer.candidates(self.services)))
+
+    def test_version_selects_subset(self):
+        self.services.update([instance("canary", zone="b", canary=True, version="v2")])
+        self.assertEqual(self.hosts(self.balancer.candidates(self.services, version="v2")), ["canary"])
+
+    def test_unknown_version_falls_back_to_stable(self):
+        self.assertEqual(len(self.balancer.candidates(self.services, version="v9")), 3)
+
+    def test_deregistered_instances_are_pruned(self):
+        self.balancer.eject("/services/movies/gone:5001")
+        with self.balancer.track("/services/movies/gone:5001"):
+            pass
+        self.balancer.candidates(self.services)
+        self.assertNotIn("/services/movies/gone:5001", self.balancer._ejected)
+        self.assertNotIn("/services/movies/gone:5001", self.balancer._in_flight)
+
+
+if __name__ == "__main__":
+    unittest.main()
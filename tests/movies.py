@@ -21,6 +21,16 @@ class TestMoviesService(unittest.TestCase):
                     "Got {} but expected 404".format(
                         actual_reply.status_code))
 
+    def test_not_modified(self):
+        """ Test /movies answers 304 for a matching If-None-Match"""
+        reply = requests.get(self.url)
+        etag = reply.headers["ETag"]
+        actual_reply = requests.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(actual_reply.status_code, 304,
+                    "Got {} but expected 304".format(
+                        actual_reply.status_code))
+        self.assertEqual(actual_reply.headers["ETag"], etag)
+
 
 GOOD_RESPONSES = {
   "720d006c-3a57-4b6a-b18f-9b713b073f3c": {
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api-gateway"))
+
+from app import registry_snapshot
+from app.registry_snapshot import RegistrySnapshotWriter, SharedRegistry
+
+
+def movies(host):
+    return {"movies": {"/services/movies/{}:5001".format(host): {"name": "movies", "host": host, "port": 5001}}}
+
+
+class TestSharedRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "registry.json")
+        self.registry = SharedRegistry(self.path)
+
+    def write(self, services, updated_at=None):
+        """ Replace the snapshot the way the writer does, with a new inode"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"updated_at": updated_at or time.time(), "services": services}, f)
+        os.replace(tmp_path, self.path)
+
+    def hosts(self):
+        return [info["host"] for info in self.registry.discover_service("movies").values()]
+
+    def test_missing_snapshot_is_empty(self):
+        self.assertEqual(self.registry.list_all_services(), {})
+        self.assertFalse(self.registry.is_fresh())
+
+    def test_reloads_when_snapshot_is_replaced(self):
+        self.write(movies("a"))
+        self.assertEqual(self.hosts(), ["a"])
+        self.write(movies("b"))
+        self.assertEqual(self.hosts(), ["b"])
+
+    def test_reloads_when_mtime_changes(self):
+        self.write(movies("a"))
+        self.assertEqual(self.hosts(), ["a"])
+        with open(self.path, "w") as f:
+            json.dump({"updated_at": time.time(), "services": movies("b")}, f)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        self.assertEqual(self.hosts(), ["b"])
+
+    def test_unchanged_snapshot_is_not_reparsed(self):
+        self.write(movies("a"))
+        self.registry.list_all_services()
+        with mock.patch.object(registry_snapshot.json, "load") as load:
+            self.assertEqual(self.hosts(), ["a"])
+        load.assert_not_called()
+
+    def test_is_fresh(self):
+        self.registry.max_age = 15
+        self.write(movies("a"))
+        self.assertTrue(self.registry.is_fresh())
+        self.write(movies("a"), updated_at=time.time() - 60)
+        self.assertFalse(self.registry.is_fresh())
+
+    def test_writes_close_their_etcd_client(self):
+        with mock.patch.object(registry_snapshot, "ServiceRegistry") as service_registry:
+            self.registry.register_service("movies", "a", 5001)
+            self.registry.deregister_services([{"name": "movies", "host": "a", "port": 5001}])
+        self.assertEqual(service_registry.call_count, 2)
+        self.assertEqual(service_registry.return_value.shutdown.call_count, 2)
+
+    def test_reads_writer_snapshot(self):
+        etcd = mock.Mock()
+        etcd.list_all_services.return_value = movies("a")
+        RegistrySnapshotWriter(self.path, registry=etcd).write_snapshot()
+        self.assertEqual(self.hosts(), ["a"])
+        self.assertTrue(self.registry.is_fresh())
+
+
+if __name__ == "__main__":
+    unittest.main()
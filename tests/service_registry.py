@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api-gateway"))
+
+from app import service_registry
+from app.service_registry import ServiceRegistry
+
+
+class FakeTransactions:
+    @staticmethod
+    def put(key, value, lease=None):
+        return "put", key, value
+
+    @staticmethod
+    def delete(key):
+        return "delete", key
+
+
+class FakeEtcd:
+    def __init__(self, fail_on_transaction=None):
+        self.transactions = FakeTransactions()
+        self.applied = []
+        self.fail_on_transaction = fail_on_transaction
+        self.puts = []
+        self.leases = []
+
+    def lease(self, ttl):
+        self.leases.append(ttl)
+        return "lease-{}".format(len(self.leases))
+
+    def put(self, key, value, lease=None):
+        self.puts.append((key, lease))
+
+    def transaction(self, compare, success, failure):
+        if len(self.applied) == self.fail_on_transaction:
+            raise RuntimeError("etcd unavailable")
+        self.applied.append(success)
+        return True, []
+
+
+def instances(count, name="movies"):
+    return [{"name": name, "host": "host-{}".format(i), "port": 5001} for i in range(count)]
+
+
+class TestServiceRegistryBatches(unittest.TestCase):
+    def registry(self, client):
+        with mock.patch.object(service_registry.etcd3, "client", return_value=client):
+            return ServiceRegistry()
+
+    def test_large_batch_is_split_into_chunks(self):
+        client = FakeEtcd()
+        self.registry(client).register_services(instances(300))
+        self.assertEqual([len(chunk) for chunk in client.applied], [128, 128, 44])
+
+    def test_duplicate_keys_collapse_to_last_entry(self):
+        client = FakeEtcd()
+        batch = instances(2) + [dict(instances(1)[0], metadata={"zone": "b"})]
+        self.registry(client).register_services(batch)
+        self.assertEqual(len(client.applied), 1)
+        puts = {key: json.loads(value) for _, key, value in client.applied[0]}
+        self.assertEqual(len(puts), 2)
+        self.assertEqual(puts["/services/movies/host-0:5001"]["metadata"], {"zone": "b"})
+
+    def test_deregister_collapses_duplicate_keys(self):
+        client = FakeEtcd()
+        self.registry(client).deregister_services(instances(2) + instances(2))
+        self.assertEqual(client.applied, [[("delete", "/services/movies/host-0:5001"),
+                                           ("delete", "/services/movies/host-1:5001")]])
+
+    def test_failed_middle_chunk_is_raised(self):
+        """ Chunks before the failing one stay applied, later ones are not attempted"""
+        client = FakeEtcd(fail_on_transaction=1)
+        with self.assertRaises(RuntimeError):
+            self.registry(client).register_services(instances(300))
+        self.assertEqual([len(chunk) for chunk in client.applied], [128])
+
+    def test_rejected_transaction_is_raised(self):
+        client = FakeEtcd()
+        client.transaction = lambda compare, success, failure: (False, [])
+        with self.assertRaises(RuntimeError):
+            self.registry(client).deregister_services(instances(1))
+
+
+class TestServiceRegistryLeases(unittest.TestCase):
+    def registry(self, client):
+        with mock.patch.object(service_registry.etcd3, "client", return_value=client):
+            return ServiceRegistry()
+
+    def test_registration_with_ttl_uses_a_lease(self):
+        client = FakeEtcd()
+        self.registry(client).register_service("movies", "host-0", 5001, ttl=90)
+        self.assertEqual(client.leases, [90])
+        self.assertEqual(client.puts, [("/services/movies/host-0:5001", "lease-1")])
+
+    def test_registration_without_ttl_is_permanent(self):
+        client = FakeEtcd()
+        self.registry(client).register_service("movies", "host-0", 5001)
+        self.assertEqual(client.leases, [])
+        self.assertEqual(client.puts, [("/services/movies/host-0:5001", None)])
+
+
+class TestBatchEndpoints(unittest.TestCase):
+    def setUp(self):
+        from app import api_gateway
+        self.registry = mock.Mock()
+        patcher = mock.patch.object(api_gateway, "_registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = api_gateway.app.test_client()
+
+    def test_malformed_bodies_are_rejected(self):
+        for url in ("/register/batch", "/unregister/batch"):
+            for body in ("not json", "[]", '{"services": {}}', '{"services": [1]}',
+                         '{"services": [{"name": "movies", "host": "movies"}]}'):
+                response = self.client.post(url, data=body, content_type="application/json")
+                self.assertEqual(response.status_code, 400, "{} {}".format(url, body))
+        self.registry.register_services.assert_not_called()
+        self.registry.deregister_services.assert_not_called()
+
+    def test_valid_batch_is_forwarded(self):
+        response = self.client.post("/register/batch", json={"services": instances(2)})
+        self.assertEqual(response.status_code, 201)
+        self.registry.register_services.assert_called_once_with(instances(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,6 +31,16 @@ class TestShowTimesService(unittest.TestCase):
                          "Got {} but expected 404".format(
                              actual_reply.status_code))
 
+    def test_not_modified(self):
+        """ Test /showtimes/<date> answers 304 for a matching If-None-Match"""
+        url = "{}/{}".format(self.url, "20151130")
+        etag = requests.get(url).headers["ETag"]
+        actual_reply = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(actual_reply.status_code, 304,
+                         "Got {} but expected 304".format(
+                             actual_reply.status_code))
+        self.assertEqual(actual_reply.content, b"")
+
 GOOD_RESPONSES = {
     "20151130": [
         "720d006c-3a57-4b6a-b18f-9b713b073f3c",
@@ -1,30 +1,22 @@
-from flask import Flask
 from werkzeug.exceptions import NotFound, ServiceUnavailable
 import requests
 import os
-import json
-from flask import make_response
+import grpc
+from service_runtime import (
+    Service, GrpcClient, phase, outgoing_headers, wants_protobuf, cinema_pb2
+)
 
+service = Service("users", port=5000, import_name=__name__)
+app = service.app
+nice_json = service.nice_json
+protobuf_response = service.protobuf_response
 
-def root_dir():
-    """Returns the root directory for this service."""
-    return os.path.dirname(os.path.abspath(__file__))
+# With a gRPC target set, calls to that service share one multiplexed
+# channel and exchange protobuf records instead of JSON
+bookings_grpc = GrpcClient(os.getenv("BOOKINGS_GRPC_TARGET")) if os.getenv("BOOKINGS_GRPC_TARGET") else None
+movies_grpc = GrpcClient(os.getenv("MOVIES_GRPC_TARGET")) if os.getenv("MOVIES_GRPC_TARGET") else None
 
-def nice_json(arg):
-    response = make_response(json.dumps(arg, sort_keys=True, indent=4))
-    response.headers['Content-type'] = "application/json"
-    return response
-
-app = Flask(__name__)
-
-# Update the JSON file path
-json_file_path = os.path.join(root_dir(), "database/users.json")
-
-try:
-    with open(json_file_path, "r") as f:
-        users_data = json.load(f)
-except FileNotFoundError:
-    print(f"Error: {json_file_path} does not exist.")
+users = service.load_dataset("users.json")
 
 @app.route("/", methods=['GET'])
 def hello():
@@ -36,12 +28,65 @@ def hello():
             "bookings": "/users/<username>/bookings",
             "suggested": "/users/<username>/suggested"
         }
-    })
+    }, cache_key="/")
+
+
+def fetch_bookings(username):
+    """
+    Gets a user's bookings from the 'Bookings Service'.
+    :param username:
+    :return: Dict of date to movie ids
+    """
+    path = "/bookings/{}".format(username)
+    not_found = "No bookings were found for {}".format(username)
+    if bookings_grpc is None:
+        response = requests.get("http://127.0.0.1:5003" + path, headers=outgoing_headers())
+        check_status("Bookings", response.status_code, not_found)
+        return response.json()
+
+    response = bookings_grpc.get(path, headers=outgoing_headers())
+    check_status("Bookings", response.status, not_found)
+    dates = cinema_pb2.Bookings.FromString(response.body).dates
+    return {date: list(movie_ids.ids) for date, movie_ids in dates.items()}
+
+
+def fetch_movie(movieid):
+    """
+    Gets a movie record from the 'Movie Service'.
+    :param movieid:
+    :return: Movie record
+    """
+    path = "/movies/{}".format(movieid)
+    not_found = "Movie '{}' not found.".format(movieid)
+    if movies_grpc is None:
+        response = requests.get("http://127.0.0.1:5001" + path, headers=outgoing_headers())
+        check_status("Movie", response.status_code, not_found)
+        return response.json()
+
+    response = movies_grpc.get(path, headers=outgoing_headers())
+    check_status("Movie", response.status, not_found)
+    movie = cinema_pb2.Movie.FromString(response.body)
+    return {"title": movie.title, "rating": movie.rating, "uri": movie.uri}
+
+
+def check_status(service_name, status, not_found):
+    """
+    Map another service's reply status to this service's errors before
+    its body is decoded.
+    """
+    if status == 404:
+        raise NotFound(not_found)
+    if status != 200:
+        raise ServiceUnavailable("The {} service answered {}.".format(service_name, status))
 
 
 @app.route("/users", methods=['GET'])
 def users_list():
-    return nice_json(users)
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.Users(
+            users={username: cinema_pb2.User(**user) for username, user in users.items()}
+        ), cache_key="/users")
+    return nice_json(users, cache_key="/users")
 
 
 @app.route("/users/<username>", methods=['GET'])
@@ -49,7 +94,9 @@ def user_record(username):
     if username not in users:
         raise NotFound
 
-    return nice_json(users[username])
+    if wants_protobuf():
+        return protobuf_response(lambda: cinema_pb2.User(**users[username]), cache_key=username)
+    return nice_json(users[username], cache_key=username)
 
 
 @app.route("/users/<username>/bookings", methods=['GET'])
@@ -64,25 +111,21 @@ def user_bookings(username):
         raise NotFound("User '{}' not found.".format(username))
 
     try:
-        users_bookings = requests.get("http://127.0.0.1:5003/bookings/{}".format(username))
-    except requests.exceptions.ConnectionError:
+        with phase("bookings"):
+            users_bookings = fetch_bookings(username)
+    except (requests.exceptions.ConnectionError, grpc.RpcError):
         raise ServiceUnavailable("The Bookings service is unavailable.")
 
-    if users_bookings.status_code == 404:
-        raise NotFound("No bookings were found for {}".format(username))
-
-    users_bookings = users_bookings.json()
-
     # For each booking, get the rating and the movie title
     result = {}
-    for date, movies in users_bookings.iteritems():
+    for date, movies in users_bookings.items():
         result[date] = []
         for movieid in movies:
             try:
-                movies_resp = requests.get("http://127.0.0.1:5001/movies/{}".format(movieid))
-            except requests.exceptions.ConnectionError:
+                with phase("movies"):
+                    movies_resp = fetch_movie(movieid)
+            except (requests.exceptions.ConnectionError, grpc.RpcError):
                 raise ServiceUnavailable("The Movie service is unavailable.")
-            movies_resp = movies_resp.json()
             result[date].append({
                 "title": movies_resp["title"],
                 "rating": movies_resp["rating"],
@@ -104,4 +147,4 @@ def user_suggested(username):
 
 
 if __name__ == "__main__":
-    app.run(port=5000, debug=True)
+    service.run()